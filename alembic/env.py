@@ -18,7 +18,8 @@ from logging.config import fileConfig
 config = context.config
 fileConfig(config.config_file_name)
 
-from librarian_server import app, db
+from librarian_server import app, db, import_service_modules
+import_service_modules()  # make sure that all of the models are registered
 target_metadata = db.metadata
 
 
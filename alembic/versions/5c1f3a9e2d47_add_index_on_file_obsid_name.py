@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD License.
+
+"""Add index on (File.obsid, File.name).
+
+Revision ID: 5c1f3a9e2d47
+Revises: 464899566429
+Create Date: 2026-10-14 10:12:43.518207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5c1f3a9e2d47'
+down_revision = '464899566429'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('file_obsid_name', 'file', ['obsid', 'name'], unique=False)
+
+
+def downgrade():
+    op.drop_index('file_obsid_name', table_name='file')
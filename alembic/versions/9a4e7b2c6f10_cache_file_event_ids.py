@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD License.
+
+"""Have the FileEvent ID sequence hand out IDs in blocks of 100.
+
+Revision ID: 9a4e7b2c6f10
+Revises: 5c1f3a9e2d47
+Create Date: 2026-10-14 11:03:27.904815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '9a4e7b2c6f10'
+down_revision = '5c1f3a9e2d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only Postgres has a sequence behind this column.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER SEQUENCE file_event_id_seq CACHE 100')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER SEQUENCE file_event_id_seq CACHE 1')
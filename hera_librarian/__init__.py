@@ -146,6 +146,16 @@ class LibrarianClient(object):
                                   payload=kwargs,
                                   )
 
+    def create_file_events_batch(self, events):
+        """Create events for many files with a single call. *events* is a list of
+        dictionaries, each with "file_name", "type", and "payload" items, the
+        latter being a dictionary of the event data.
+
+        """
+        return self._do_http_post('create_file_events_batch',
+                                  events=events,
+                                  )
+
     def assign_observing_sessions(self, minimum_start_jd=None, maximum_start_jd=None):
         return self._do_http_post('assign_observing_sessions',
                                   minimum_start_jd=minimum_start_jd,
@@ -0,0 +1,38 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD License
+
+"""Test code in hera_librarian/__init__.py
+
+"""
+
+import io
+import json
+import urllib.parse
+
+import hera_librarian
+from hera_librarian import LibrarianClient
+
+
+def test_create_file_events_batch(monkeypatch):
+    """Test that a batch of events is sent in a single API call"""
+    calls = []
+
+    def fake_urlopen(url, params):
+        calls.append((url, urllib.parse.parse_qs(params.decode("utf-8"))))
+        return io.BytesIO(b'{"success": true}')
+
+    monkeypatch.setattr(hera_librarian.urllib.request, "urlopen", fake_urlopen)
+    client = LibrarianClient("test", {"url": "http://localhost:21108/", "authenticator": "abc"})
+    events = [
+        {"file_name": "zen.2458043.12552.xx.HH.uvA", "type": "test", "payload": {"n": 1}},
+        {"file_name": "zen.2458043.13298.xx.HH.uvA", "type": "test", "payload": {}},
+    ]
+    assert client.create_file_events_batch(events) == {"success": True}
+
+    assert len(calls) == 1
+    url, params = calls[0]
+    assert url == "http://localhost:21108/api/create_file_events_batch"
+    assert json.loads(params["request"][0]) == {"events": events, "authenticator": "abc"}
+
+    return
@@ -10,6 +10,7 @@ probably ways to work around that but things work well enough as is.
 
 
 import logging
+import os
 import sys
 from pkg_resources import get_distribution, DistributionNotFound, parse_version
 
@@ -44,11 +45,17 @@ def _initialize():
         )
     config_path = os.environ["LIBRARIAN_CONFIG_PATH"]
     try:
-        with open(config_path) as f:
-            config = json.load(f)
+        with open(config_path, 'rb') as f:
+            config_data = f.read()
     except FileNotFoundError:
         raise ValueError(f"Librarian configuration file {config_path} not found.")
 
+    try:
+        import orjson
+        config = orjson.loads(config_data)
+    except ImportError:
+        config = json.loads(config_data)
+
     if 'SECRET_KEY' not in config:
         print('cannot start server: must define the Flask "secret key" as the item '
               '"SECRET_KEY" in "server-config.json"', file=sys.stderr)
@@ -96,17 +103,62 @@ def is_primary_server():
     return tornado.process.task_id() == 0
 
 
-# We have to manually import the modules that implement services. It's not
+# The modules that implement services are imported lazily, on first attribute
+# access, so that entry points that never serve HTTP don't pay for the models,
+# routes, and their dependencies. Each module collects its Flask routes on a
+# blueprint, and the server path registers them all (see
+# `register_blueprints`) before the first request arrives. Setting the
+# `LIBRARIAN_EAGER_IMPORT` environment variable restores the old behavior of
+# importing everything and registering all of the routes right away. It's not
 # crazy to worry about circular dependency issues, but everything will be all
 # right.
 
-from . import webutil
-from . import observation
-from . import store
-from . import file
-from . import bgtasks
-from . import search
-from . import misc
+_service_modules = (
+    'webutil',
+    'observation',
+    'store',
+    'file',
+    'bgtasks',
+    'search',
+    'misc',
+)
+
+
+def __getattr__(name):
+    if name in _service_modules:
+        import importlib
+        mod = importlib.import_module('.' + name, __name__)
+        setattr(sys.modules[__name__], name, mod)
+        return mod
+
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def import_service_modules():
+    """Import all of the modules that implement services, registering their
+    database models and Flask routes.
+
+    """
+    for name in _service_modules:
+        getattr(sys.modules[__name__], name)
+
+
+def register_blueprints():
+    """Import all of the modules that implement services and register their
+    Flask routes with the app. This only needs to be done if we're going to
+    serve HTTP requests.
+
+    """
+    import_service_modules()
+
+    for name in _service_modules:
+        blueprint = getattr(sys.modules[__name__], name).blueprint
+        if blueprint.name not in app.blueprints:
+            app.register_blueprint(blueprint)
+
+
+if os.environ.get('LIBRARIAN_EAGER_IMPORT'):
+    register_blueprints()
 
 
 # Finally ...
@@ -164,6 +216,7 @@ def get_version_info():
 
 
 def commandline(argv):
+    register_blueprints()
     from . import bgtasks
 
     version_string, git_hash = get_version_info()
@@ -279,9 +332,11 @@ def maybe_add_stores():
     from .dbutil import SQLAlchemyError
     from .store import Store
 
-    for name, cfg in app.config.get('add-stores', {}).items():
-        prev = Store.query.filter(Store.name == name).first()
-        if prev is None:
+    add_stores = app.config.get('add-stores', {})
+    known = set(n for n, in db.session.query(Store.name).filter(Store.name.in_(add_stores.keys())))
+
+    for name, cfg in add_stores.items():
+        if name not in known:
             store = Store(name, cfg['path_prefix'], cfg['ssh_host'])
             store.http_prefix = cfg.get('http_prefix')
             store.available = cfg.get('available', True)
@@ -290,5 +345,5 @@ def maybe_add_stores():
     try:
         db.session.commit()
     except SQLAlchemyError:
-        db.rollback()
+        db.session.rollback()
         raise  # this only happens on startup, so just refuse to start
@@ -25,12 +25,14 @@ import time
 from tornado.ioloop import IOLoop
 
 
-from flask import flash, redirect, render_template, url_for
+from flask import Blueprint, flash, redirect, render_template, url_for
 
 from . import app, db, logger
 from .dbutil import NotNull
 from .webutil import ServerError, json_api, login_required, optional_arg, required_arg
 
+blueprint = Blueprint('bgtasks', __name__)
+
 
 class BackgroundTask(object):
     """A class implementing a background task.
@@ -257,7 +259,7 @@ def get_unfinished_task_count():
 
 # Web user interface
 
-@app.route('/tasks')
+@blueprint.route('/tasks')
 @login_required
 def tasks():
     the_task_manager._maybe_purge_tasks()
@@ -17,15 +17,50 @@ import datetime
 import json
 import os.path
 import re
-from flask import flash, redirect, render_template, url_for
+import time
+from flask import Blueprint, flash, redirect, render_template, url_for
+from sqlalchemy import DDL, Sequence
 from sqlalchemy.engine.row import Row
+from sqlalchemy.event import listen
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from hera_librarian import utils
 
 from . import app, db, logger
 from .dbutil import NotNull, SQLAlchemyError
-from .webutil import ServerError, json_api, login_required, optional_arg, required_arg
+from .webutil import ServerError, json_api, json_dumps, login_required, optional_arg, required_arg
 from .observation import Observation
 from .store import Store
 
+blueprint = Blueprint('file', __name__)
+
+
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
+
+def _now_utc_sec():
+    """Get the current UTC time as a naive datetime, rounded down to whole
+    seconds. We round our times so that they can be accurately represented as
+    integer Unix times, just in case floating-point rounding could sneak in as
+    an issue.
+
+    """
+    return _UNIX_EPOCH + datetime.timedelta(seconds=int(time.time()))
+
+
+# File names must fit in their database columns and may not contain slashes.
+_name_is_legal = re.compile(r'\A[^/]{1,256}\Z').match
+
+
+def _check_name(name):
+    """Check that *name* is a legal File name, raising ValueError if not.
+
+    """
+    if not _name_is_legal(name):
+        raise ValueError('illegal file name "%s": names must be 1-256 characters long '
+                         'and may not contain "/"' % name)
+
 
 def infer_file_obsid(parent_dirs, name, info):
     """Infer the obsid associated with a file based on the limited information we
@@ -105,17 +140,13 @@ class File (db.Model):
     source = NotNull(db.String(64))
     observation = db.relationship('Observation', back_populates='files')
     instances = db.relationship('FileInstance', back_populates='file')
-    events = db.relationship('FileEvent', back_populates='file')
+    events = db.relationship('FileEvent', back_populates='file', order_by='FileEvent.time.desc()')
+
+    obsid_name_index = db.Index('file_obsid_name', obsid, name)
 
     def __init__(self, name, type, obsid, source, size, md5, create_time=None):
         if create_time is None:
-            # We round our times to whole seconds so that they can be
-            # accurately represented as integer Unix times, just in case
-            # floating-point rounding could sneak in as an issue.
-            create_time = datetime.datetime.utcnow().replace(microsecond=0)
-
-        from hera_librarian import utils
-        md5 = utils.normalize_and_validate_md5(md5)
+            create_time = _now_utc_sec()
 
         self.name = name
         self.type = type
@@ -128,19 +159,16 @@ class File (db.Model):
 
     @property
     def name_as_json(self):
-        import json
         return json.dumps(self.name)
 
     def _validate(self):
-        """Check that this object's fields follow our invariants.
+        """Check that this object's fields follow our invariants, normalizing the
+        MD5 sum in the process.
 
         """
-        from hera_librarian import utils
+        _check_name(self.name)
 
-        if '/' in self.name:
-            raise ValueError('illegal file name "%s": names may not contain "/"' % self.name)
-
-        utils.normalize_and_validate_md5(self.md5)
+        self.md5 = utils.normalize_and_validate_md5(self.md5)
 
         if not (self.size >= 0):  # catches NaNs, just in case ...
             raise ValueError('illegal size %d of file "%s": negative' % (self.size, self.name))
@@ -160,18 +188,84 @@ class File (db.Model):
         null obsid. If False (the default), the file must have an obsid --
         either explicitly specified, or inferred from the file contents.
 
+        This is just the single-file version of `register_many`.
+
         """
-        parent_dirs = os.path.dirname(store_path)
-        name = os.path.basename(store_path)
+        return cls.register_many(store, [(store_path, info)], source_name,
+                                 null_obsid=null_obsid)[0]
+
+    @classmethod
+    def register_many(cls, store, entries, source_name, null_obsid=False, commit=True):
+        """Get File instances for a batch of files currently located in a store,
+        inferring their properties as in `get_inferring_info`.
+
+        *entries* is a sequence of ``(store_path, info)`` tuples, where *info*
+        may be None to have us gather the info from the store. Returns a list
+        of Files in the same order as *entries*.
+
+        Existing records are looked up with a single query, and all of the new
+        records are committed to the database in a single transaction: either
+        all of the new Files are created, or none of them are.
+
+        If *commit* is False, the new Files are left pending in the session so
+        that the caller can commit them along with other records. In that
+        case, the caller must tell M&C about the new Files, with
+        `mc_integration.note_file_created`, once they are committed.
+
+        """
+        from . import mc_integration as MC
+
+        names = [os.path.basename(store_path) for store_path, _ in entries]
+        known = {}
+
+        if len(names):
+            for prev in cls.query.filter(cls.name.in_(set(names))):
+                # If there's already a record for this File name, then its
+                # corresponding Observation etc must already be available.
+                # Let's leave well enough alone.
+                known[prev.name] = prev
+
+        new_files = []
+
+        try:
+            for (store_path, info), name in zip(entries, names):
+                if name in known:
+                    continue
+
+                # Darn. We're going to have to create the File, and maybe its
+                # Observation too. Get to it.
+
+                fobj = cls._infer_new(store, store_path, name, source_name, info, null_obsid)
+                # Adding the new record as we go means that autoflush will make
+                # it visible to `infer_file_obsid` for later files in the batch.
+                db.session.add(fobj)
+                known[name] = fobj
+                new_files.append(fobj)
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if commit and len(new_files):
+            try:
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                app.log_exception(sys.exc_info())
+                raise ServerError('failed to add %d new files to database; see logs for details',
+                                  len(new_files))
+
+            for fobj in new_files:
+                MC.note_file_created(fobj)
+
+        return [known[name] for name in names]
 
-        prev = cls.query.get(name)
-        if prev is not None:
-            # If there's already a record for this File name, then its corresponding
-            # Observation etc must already be available. Let's leave well enough alone:
-            return prev
+    @classmethod
+    def _infer_new(cls, store, store_path, name, source_name, info, null_obsid):
+        """Create a new File record for a file located in a store, inferring its
+        properties. The record is not added or committed to the database.
 
-        # Darn. We're going to have to create the File, and maybe its
-        # Observation too. Get to it.
+        """
+        parent_dirs = os.path.dirname(store_path)
 
         if info is None:
             try:
@@ -183,7 +277,6 @@ class File (db.Model):
         md5 = required_arg(info, str, 'md5')
         type = required_arg(info, str, 'type')
 
-        from .observation import Observation
         from . import mc_integration as MC
 
         obsid = optional_arg(info, int, 'obsid')
@@ -220,23 +313,12 @@ class File (db.Model):
         if isinstance(obsid, Row):
             # convert from Row object to integer
             obsid = obsid._asdict()["obsid"]
-        fobj = File(name, type, obsid, source_name, size, md5)
+        fobj = cls(name, type, obsid, source_name, size, md5)
 
         if MC.is_file_record_invalid(fobj):
             raise ServerError('new file %s (obsid %s) rejected by M&C; see M&C error logs for the reason',
                               name, obsid)
 
-        db.session.add(fobj)
-
-        try:
-            db.session.commit()
-        except SQLAlchemyError:
-            db.session.rollback()
-            app.log_exception(sys.exc_info())
-            raise ServerError('failed to add new file %s to database; see logs for details', name)
-
-        MC.note_file_created(fobj)
-
         return fobj
 
     def delete_instances(self, mode='standard', restrict_to_store=None):
@@ -337,8 +419,7 @@ class File (db.Model):
 
     @property
     def create_time_unix(self):
-        import calendar
-        return calendar.timegm(self.create_time.timetuple())
+        return (self.create_time - _UNIX_EPOCH) // _ONE_SECOND
 
     @property
     def create_time_astropy(self):
@@ -476,10 +557,10 @@ class FileInstance (db.Model):
     name_index = db.Index('file_instance_name', name)
 
     def __init__(self, store_obj, parent_dirs, name, deletion_policy=DeletionPolicy.DISALLOWED):
-        if '/' in name:
-            raise ValueError('illegal file name "%s": names may not contain "/"' % name)
+        _check_name(name)
 
         self.store = store_obj.id
+        self.store_object = store_obj  # saves a SELECT when we need the Store later
         self.parent_dirs = parent_dirs
         self.name = name
         self.deletion_policy = deletion_policy
@@ -490,11 +571,9 @@ class FileInstance (db.Model):
 
     @property
     def store_path(self):
-        import os.path
         return os.path.join(self.parent_dirs, self.name)
 
     def full_path_on_store(self):
-        import os.path
         return os.path.join(self.store_object.path_prefix, self.parent_dirs, self.name)
 
     def descriptive_name(self):
@@ -515,6 +594,9 @@ class FileInstance (db.Model):
         )
 
 
+_file_event_id_seq = Sequence('file_event_id_seq', cache=100)
+
+
 class FileEvent (db.Model):
     """A FileEvent is a something that happens to a File on this Librarian.
 
@@ -532,7 +614,11 @@ class FileEvent (db.Model):
     """
     __tablename__ = 'file_event'
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    # This is the sequence that Postgres implicitly created for our original
+    # schema. Having the server hand out IDs in blocks saves a bit of work on
+    # each insert; note that this means that IDs are not necessarily ordered
+    # by time if there are multiple server processes.
+    id = db.Column(db.BigInteger, _file_event_id_seq, primary_key=True)
     name = db.Column(db.String(256), db.ForeignKey(File.name))
     time = NotNull(db.DateTime)
     type = db.Column(db.String(64))
@@ -542,22 +628,46 @@ class FileEvent (db.Model):
     name_index = db.Index('file_event_name', name)
 
     def __init__(self, name, type, payload_struct):
-        if '/' in name:
-            raise ValueError('illegal file name "%s": names may not contain "/"' % name)
+        _check_name(name)
 
         self.name = name
-        self.time = datetime.datetime.utcnow().replace(microsecond=0)
+        self.time = _now_utc_sec()
         self.type = type
-        self.payload = json.dumps(payload_struct)
+        self.payload = json_dumps(payload_struct)
 
     @property
     def payload_json(self):
+        # We decode with the standard library, since orjson turns integers
+        # wider than 64 bits into floats and refuses the NaNs that older
+        # versions of this code may have written.
         return json.loads(self.payload)
 
+    @classmethod
+    def bulk_create(cls, events):
+        """Insert a batch of new FileEvents, as created by methods like
+        `File.make_generic_event`, using a single multi-row INSERT. The
+        records are not committed, and the objects passed in are not added to
+        the session.
+
+        """
+        db.session.bulk_insert_mappings(cls, [
+            dict(name=e.name, time=e.time, type=e.type, payload=e.payload)
+            for e in events
+        ])
+
+
+# In migrated databases, the sequence is also the column's server-side
+# default. Only Postgres has sequences, so we only add the default there.
+listen(
+    FileEvent.__table__, 'after_create',
+    DDL("ALTER TABLE file_event ALTER COLUMN id SET DEFAULT nextval('file_event_id_seq')")
+    .execute_if(dialect='postgresql')
+)
+
 
 # RPC endpoints
 
-@app.route('/api/create_file_event', methods=['GET', 'POST'])
+@blueprint.route('/api/create_file_event', methods=['GET', 'POST'])
 @json_api
 def create_file_event(args, sourcename=None):
     """Create a FileEvent record for a File.
@@ -586,7 +696,48 @@ def create_file_event(args, sourcename=None):
     return {}
 
 
-@app.route('/api/locate_file_instance', methods=['GET', 'POST'])
+@blueprint.route('/api/create_file_events_batch', methods=['GET', 'POST'])
+@json_api
+def create_file_events_batch(args, sourcename=None):
+    """Create FileEvent records for a batch of Files in one go.
+
+    The "events" argument is a list of dictionaries, each of which has the
+    same "file_name", "type", and "payload" items as the arguments to
+    `create_file_event`. Either all of the events are created, or none of
+    them are.
+
+    """
+    events = required_arg(args, list, 'events')
+    parsed = []
+
+    for info in events:
+        if not isinstance(info, dict):
+            raise ServerError('items of parameter "events" should be dictionaries, but got %r',
+                              info)
+
+        parsed.append((required_arg(info, str, 'file_name'),
+                       required_arg(info, str, 'type'),
+                       required_arg(info, dict, 'payload')))
+
+    names = set(p[0] for p in parsed)
+    known = set(n for n, in db.session.query(File.name).filter(File.name.in_(names)))
+
+    missing = names - known
+    if len(missing):
+        raise ServerError('no known file "%s"', min(missing))
+
+    try:
+        FileEvent.bulk_create(FileEvent(*p) for p in parsed)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        app.log_exception(sys.exc_info())
+        raise ServerError('failed to add events to database -- see server logs for details')
+
+    return {}
+
+
+@blueprint.route('/api/locate_file_instance', methods=['GET', 'POST'])
 @json_api
 def locate_file_instance(args, sourcename=None):
     """Tell the caller where to find an instance of the named file.
@@ -594,11 +745,14 @@ def locate_file_instance(args, sourcename=None):
     """
     file_name = required_arg(args, str, 'file_name')
 
-    file = File.query.get(file_name)
-    if file is None:
-        raise ServerError('no known file "%s"', file_name)
+    # We only need one instance, so just ask for one -- `first()` adds a LIMIT
+    # to the query.
+    inst = (FileInstance.query
+            .options(joinedload(FileInstance.store_object))
+            .filter(FileInstance.name == file_name)
+            .first())
 
-    for inst in file.instances:
+    if inst is not None:
         return {
             'full_path_on_store': inst.full_path_on_store(),
             'store_name': inst.store_name,
@@ -606,10 +760,14 @@ def locate_file_instance(args, sourcename=None):
             'store_ssh_host': inst.store_object.ssh_host,
         }
 
+    # Give a more helpful error message if the file is unknown altogether.
+    if File.query.options(load_only(File.name)).get(file_name) is None:
+        raise ServerError('no known file "%s"', file_name)
+
     raise ServerError('no instances of file "%s" on this librarian', file_name)
 
 
-@app.route('/api/set_one_file_deletion_policy', methods=['GET', 'POST'])
+@blueprint.route('/api/set_one_file_deletion_policy', methods=['GET', 'POST'])
 @json_api
 def set_one_file_deletion_policy(args, sourcename=None):
     """Set the deletion policy of one instance of a file.
@@ -663,7 +821,7 @@ def set_one_file_deletion_policy(args, sourcename=None):
     return {}
 
 
-@app.route('/api/delete_file_instances', methods=['GET', 'POST'])
+@blueprint.route('/api/delete_file_instances', methods=['GET', 'POST'])
 @json_api
 def delete_file_instances(args, sourcename=None):
     """DANGER ZONE! Delete instances of the named file on all stores!
@@ -685,7 +843,7 @@ def delete_file_instances(args, sourcename=None):
     return file.delete_instances(mode=mode, restrict_to_store=restrict_to_store)
 
 
-@app.route('/api/delete_file_instances_matching_query', methods=['GET', 'POST'])
+@blueprint.route('/api/delete_file_instances_matching_query', methods=['GET', 'POST'])
 @json_api
 def delete_file_instances_matching_query(args, sourcename=None):
     """DANGER ZONE! Delete instances of lots of files on the store!
@@ -714,21 +872,24 @@ def delete_file_instances_matching_query(args, sourcename=None):
 
 # Web user interface
 
-@app.route('/files/<string:name>')
+@blueprint.route('/files/<string:name>')
 @login_required
 def specific_file(name):
-    file = File.query.get(name)
+    # The events are fetched with a separate SELECT, rather than being joined
+    # in alongside the instances, to avoid getting back the cross product of
+    # the two collections.
+    file = (File.query
+            .options(joinedload(File.instances).joinedload(FileInstance.store_object),
+                     selectinload(File.events))
+            .get(name))
     if file is None:
         flash('No such file "%s" known' % name)
-        return redirect(url_for('index'))
-
-    instances = list(FileInstance.query.filter(FileInstance.name == name))
-    events = sorted(file.events, key=lambda e: e.time, reverse=True)
+        return redirect(url_for('misc.index'))
 
     return render_template(
         'file-individual.html',
         title='%s File %s' % (file.type, file.name),
         file=file,
-        instances=instances,
-        events=events,
+        instances=file.instances,
+        events=file.events,  # newest first
     )
@@ -9,7 +9,7 @@ create_records
 gather_records
 ''').split()
 
-from flask import flash, redirect, render_template, url_for
+from flask import Blueprint, flash, redirect, render_template, url_for
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
@@ -17,6 +17,8 @@ from . import app, db
 from .dbutil import SQLAlchemyError
 from .webutil import ServerError, json_api, login_required, optional_arg, required_arg
 
+blueprint = Blueprint('misc', __name__)
+
 
 def gather_records(file):
     """Gather up the set of database records that another Librarian will need if
@@ -204,13 +206,13 @@ def copyfiletree(src, dst):
 
 # Misc ...
 
-@app.template_filter('strftime')
+@blueprint.app_template_filter('strftime')
 def _jinja2_filter_datetime(unixtime, fmt=None):
     import time
     return time.strftime('%c', time.localtime(unixtime))
 
 
-@app.template_filter('duration')
+@blueprint.app_template_filter('duration')
 def _jinja2_filter_duration(seconds, fmt=None):
     if seconds < 90:
         return '%.0f seconds' % seconds
@@ -221,7 +223,7 @@ def _jinja2_filter_duration(seconds, fmt=None):
     return '%.1f days' % (seconds / 86400)
 
 
-@app.context_processor
+@blueprint.app_context_processor
 def inject_globals():
     import datetime
     import dateutil.tz
@@ -264,7 +266,7 @@ def inject_globals():
 
 # JSON API
 
-@app.route('/api/ping', methods=['GET', 'POST'])
+@blueprint.route('/api/ping', methods=['GET', 'POST'])
 @json_api
 def ping(args, sourcename=None):
     return {'message': 'hello'}
@@ -272,7 +274,7 @@ def ping(args, sourcename=None):
 
 # Web UI
 
-@app.route('/')
+@blueprint.route('/')
 @login_required
 def index():
     from .observation import ObservingSession
@@ -287,7 +289,7 @@ def index():
         recent_sessions=rs,
     )
 
-@app.route('/connectivity-check')
+@blueprint.route('/connectivity-check')
 @login_required
 def connectivity_check():
     from .store import Store
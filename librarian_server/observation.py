@@ -11,13 +11,15 @@ ObservingSession
 Observation
 ''').split()
 
-from flask import flash, redirect, render_template, url_for
+from flask import Blueprint, flash, redirect, render_template, url_for
 
 from hera_librarian.utils import format_jd_as_calendar_date, format_jd_as_iso_date_time
 from . import app, db
 from .dbutil import NotNull, SQLAlchemyError
 from .webutil import ServerError, json_api, login_required, optional_arg, required_arg
 
+blueprint = Blueprint('observation', __name__)
+
 
 class ObservingSession (db.Model):
     """An ObservingSession is a sequence of contiguous, or nearly so, observations
@@ -209,7 +211,7 @@ class Observation (db.Model):
 
 # RPC endpoints
 
-@app.route('/api/assign_observing_sessions', methods=['GET', 'POST'])
+@blueprint.route('/api/assign_observing_sessions', methods=['GET', 'POST'])
 @json_api
 def assign_observing_sessions(args, sourcename=None):
     """This call instructs the Librarian to find all Observations that
@@ -346,7 +348,7 @@ def assign_observing_sessions(args, sourcename=None):
     return retval
 
 
-@app.route('/api/describe_session_without_event', methods=['GET', 'POST'])
+@blueprint.route('/api/describe_session_without_event', methods=['GET', 'POST'])
 @json_api
 def describe_session_without_event(args, sourcename=None):
     """Return information about the files in a session that does not contain a
@@ -458,7 +460,7 @@ def describe_session_without_event(args, sourcename=None):
 
 # Web user interface
 
-@app.route('/observations')
+@blueprint.route('/observations')
 @login_required
 def observations():
     q = Observation.query.order_by(Observation.start_time_jd.desc()).limit(50)
@@ -469,13 +471,13 @@ def observations():
     )
 
 
-@app.route('/observations/<int:obsid>')
+@blueprint.route('/observations/<int:obsid>')
 @login_required
 def specific_observation(obsid):
     obs = Observation.query.get(obsid)
     if obs is None:
         flash('No such observation %r known' % obsid)
-        return redirect(url_for('observations'))
+        return redirect(url_for('observation.observations'))
 
     from .file import File
 
@@ -489,7 +491,7 @@ def specific_observation(obsid):
     )
 
 
-@app.route('/sessions/all')
+@blueprint.route('/sessions/all')
 @login_required
 def sessions_all():
     q = list(ObservingSession.query.order_by(ObservingSession.start_time_jd.desc()))
@@ -500,7 +502,7 @@ def sessions_all():
     )
 
 
-@app.route('/sessions/recent')
+@blueprint.route('/sessions/recent')
 @login_required
 def sessions_recent():
     q = list(ObservingSession.query.order_by(ObservingSession.start_time_jd.desc()).limit(30))
@@ -511,13 +513,13 @@ def sessions_recent():
     )
 
 
-@app.route('/sessions/<int:id>')
+@blueprint.route('/sessions/<int:id>')
 @login_required
 def specific_session(id):
     sess = ObservingSession.query.get(id)
     if sess is None:
         flash('No such observing session %r known' % id)
-        return redirect(url_for('sessions'))
+        return redirect(url_for('observation.sessions_all'))
 
     obs = list(Observation.query.filter(Observation.session_id ==
                                         id).order_by(Observation.start_time_jd.asc()))
@@ -25,12 +25,14 @@ import six
 import sys
 import time
 
-from flask import Response, flash, redirect, render_template, request, url_for
+from flask import Blueprint, Response, flash, redirect, render_template, request, url_for
 
 from . import app, db, is_primary_server, logger
 from .dbutil import NotNull, SQLAlchemyError
 from .webutil import ServerError, json_api, login_required, optional_arg, required_arg
 
+blueprint = Blueprint('search', __name__)
+
 
 # The search parser. We save searches in a (hopefully) simple JSON format. The
 # format is documented in `docs/Searching.md`. KEEP THE DOCS UPDATED!
@@ -932,7 +934,7 @@ def launch_stage_operation(user, search, stage_dest):
 
 # Web user interface
 
-@app.route('/standing-orders')
+@blueprint.route('/standing-orders')
 @login_required
 def standing_orders():
     q = StandingOrder.query.order_by(StandingOrder.name.asc())
@@ -944,13 +946,13 @@ def standing_orders():
     )
 
 
-@app.route('/standing-orders/<string:name>')
+@blueprint.route('/standing-orders/<string:name>')
 @login_required
 def specific_standing_order(name):
     storder = StandingOrder.query.filter(StandingOrder.name == name).first()
     if storder is None:
         flash('No such standing order "%s"' % name)
-        return redirect(url_for('standing_orders'))
+        return redirect(url_for('search.standing_orders'))
 
     try:
         cur_files = list(storder.get_files_to_copy())
@@ -973,7 +975,7 @@ default_search = """{
 }"""
 
 
-@app.route('/standing-orders/<string:ignored_name>/create', methods=['POST'])
+@blueprint.route('/standing-orders/<string:ignored_name>/create', methods=['POST'])
 @login_required
 def create_standing_order(ignored_name):
     """Note that we ignore the order name and instead takes its value from the
@@ -998,18 +1000,18 @@ def create_standing_order(ignored_name):
             raise Exception('failed to commit information to database; see logs for details')
     except Exception as e:
         flash('Cannot create "%s": %s' % (name, e))
-        return redirect(url_for('standing_orders'))
+        return redirect(url_for('search.standing_orders'))
 
-    return redirect(url_for('standing_orders') + '/' + name)
+    return redirect(url_for('search.standing_orders') + '/' + name)
 
 
-@app.route('/standing-orders/<string:name>/update', methods=['POST'])
+@blueprint.route('/standing-orders/<string:name>/update', methods=['POST'])
 @login_required
 def update_standing_order(name):
     storder = StandingOrder.query.filter(StandingOrder.name == name).first()
     if storder is None:
         flash('No such standing order "%s"' % name)
-        return redirect(url_for('standing_orders'))
+        return redirect(url_for('search.standing_orders'))
 
     new_name = required_arg(request.form, str, 'name')
     new_conn = required_arg(request.form, str, 'conn')
@@ -1030,22 +1032,22 @@ def update_standing_order(name):
             raise Exception('failed to commit update to database; see logs for details')
     except Exception as e:
         flash('Cannot update "%s": %s' % (name, e))
-        return redirect(url_for('standing_orders'))
+        return redirect(url_for('search.standing_orders'))
 
     # There might be new things to look at!
     queue_standing_order_copies()
 
     flash('Updated standing order "%s"' % new_name)
-    return redirect(url_for('standing_orders'))
+    return redirect(url_for('search.standing_orders'))
 
 
-@app.route('/standing-orders/<string:name>/delete', methods=['POST'])
+@blueprint.route('/standing-orders/<string:name>/delete', methods=['POST'])
 @login_required
 def delete_standing_order(name):
     storder = StandingOrder.query.filter(StandingOrder.name == name).first()
     if storder is None:
         flash('No such standing order "%s"' % name)
-        return redirect(url_for('standing_orders'))
+        return redirect(url_for('search.standing_orders'))
 
     db.session.delete(storder)
 
@@ -1057,7 +1059,7 @@ def delete_standing_order(name):
         raise ServerError('failed to commit deletion to database; see logs for details')
 
     flash('Deleted standing order "%s"' % name)
-    return redirect(url_for('standing_orders'))
+    return redirect(url_for('search.standing_orders'))
 
 
 # Web interface to searches outside of the standing order system
@@ -1065,7 +1067,7 @@ def delete_standing_order(name):
 sample_file_search = '{ "name-matches": "%12345%.uv" }'
 
 
-@app.route('/search-files', methods=['GET', 'POST'])
+@blueprint.route('/search-files', methods=['GET', 'POST'])
 @login_required
 def search_files():
     return render_template(
@@ -1078,7 +1080,7 @@ def search_files():
 sample_obs_search = '{ "duration-less-than": 0.003 }'
 
 
-@app.route('/search-obs', methods=['GET', 'POST'])
+@blueprint.route('/search-obs', methods=['GET', 'POST'])
 @login_required
 def search_obs():
     return render_template(
@@ -1091,7 +1093,7 @@ def search_obs():
 sample_session_search = '{ "session-id-is-exactly": 1171209640 }'
 
 
-@app.route('/search-sessions', methods=['GET', 'POST'])
+@blueprint.route('/search-sessions', methods=['GET', 'POST'])
 @login_required
 def search_sessions():
     return render_template(
@@ -1110,7 +1112,7 @@ human_session_format = 'List of sessions'
 stage_the_files_human_format = 'stage-the-files-human'
 
 
-@app.route('/search', methods=['GET', 'POST'])
+@blueprint.route('/search', methods=['GET', 'POST'])
 @login_required
 def execute_search_ui():
     """The user-facing version of the search feature.
@@ -1170,8 +1172,11 @@ def execute_search_ui():
         search = compile_search(search_text, query_type=query_type)
 
         if output_format == full_path_format:
+            from sqlalchemy.orm import joinedload
             from .file import FileInstance
-            instances = FileInstance.query.filter(FileInstance.name.in_(search))
+            instances = (FileInstance.query
+                         .options(joinedload(FileInstance.store_object))
+                         .filter(FileInstance.name.in_(search)))
             text = '\n'.join(i.full_path_on_store() for i in instances)
         elif output_format == file_name_format:
             text = '\n'.join(f.name for f in search)
@@ -1254,7 +1259,7 @@ instance_listing_json_format = 'instance-listing-json'
 obs_listing_json_format = 'obs-listing-json'
 
 
-@app.route('/api/search', methods=['GET', 'POST'])
+@blueprint.route('/api/search', methods=['GET', 'POST'])
 @json_api
 def execute_search_api(args, sourcename=None):
     """JSON API version of the search facility.
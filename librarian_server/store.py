@@ -27,7 +27,7 @@ OffloaderTask
 
 import os.path
 
-from flask import flash, redirect, render_template, url_for
+from flask import Blueprint, flash, redirect, render_template, url_for
 
 from hera_librarian.base_store import BaseStore
 
@@ -35,6 +35,8 @@ from . import app, db, logger
 from .dbutil import NotNull, SQLAlchemyError
 from .webutil import ServerError, json_api, login_required, optional_arg, required_arg
 
+blueprint = Blueprint('store', __name__)
+
 
 class Store(db.Model, BaseStore):
     """A Store is a computer with a disk where we can store data. Several of the
@@ -219,7 +221,7 @@ class Store(db.Model, BaseStore):
 
 # RPC API
 
-@app.route('/api/probe_stores', methods=['GET', 'POST'])
+@blueprint.route('/api/probe_stores', methods=['GET', 'POST'])
 @json_api
 def probe_stores(args, sourcename=None):
     """Get information about the stores attached to this Librarian.
@@ -241,7 +243,7 @@ def probe_stores(args, sourcename=None):
 
     return {'stores': store_list}
 
-@app.route('/api/initiate_upload', methods=['GET', 'POST'])
+@blueprint.route('/api/initiate_upload', methods=['GET', 'POST'])
 @json_api
 def initiate_upload(args, sourcename=None):
     """Called when Librarian client wants to upload a file instance to one of our
@@ -307,7 +309,7 @@ def initiate_upload(args, sourcename=None):
     return info
 
 
-@app.route('/api/complete_upload', methods=['GET', 'POST'])
+@blueprint.route('/api/complete_upload', methods=['GET', 'POST'])
 @json_api
 def complete_upload(args, sourcename=None):
     """Called after a Librarian client has finished uploading a file instance to
@@ -356,7 +358,7 @@ def complete_upload(args, sourcename=None):
     return {}
 
 
-@app.route('/api/register_instances', methods=['GET', 'POST'])
+@blueprint.route('/api/register_instances', methods=['GET', 'POST'])
 @json_api
 def register_instances(args, sourcename=None):
     """In principle, this RPC call is similar to what `initiate_upload` and
@@ -379,43 +381,66 @@ def register_instances(args, sourcename=None):
     store_name = required_arg(args, str, 'store_name')
     file_info = required_arg(args, dict, 'file_info')
 
-    from .file import File, FileInstance
+    from .file import File, FileEvent, FileInstance
 
     store = Store.get_by_name(store_name)  # ServerError if failure
     slashed_prefix = store.path_prefix + '/'
 
     # Sort the files to get the creation times to line up.
 
+    paths = []
+
     for full_path in sorted(file_info.keys()):
         if not full_path.startswith(slashed_prefix):
             raise ServerError('file path %r should start with "%s"',
                               full_path, slashed_prefix)
 
-        # Do we already know about this instance? If so, just ignore it.
-
         store_path = full_path[len(slashed_prefix):]
-        parent_dirs = os.path.dirname(store_path)
-        name = os.path.basename(store_path)
+        paths.append((store_path, os.path.dirname(store_path), os.path.basename(store_path)))
 
-        instance = FileInstance.query.get((store.id, parent_dirs, name))
-        if instance is not None:
-            continue
+    # Do we already know about any of these instances? If so, just ignore
+    # them. We look them all up with one query rather than one per file.
+
+    known = set()
 
-        # OK, we have to create some stuff.
+    if len(paths):
+        known.update(db.session.query(FileInstance.parent_dirs, FileInstance.name)
+                     .filter(FileInstance.store == store.id,
+                             FileInstance.name.in_(set(p[2] for p in paths))))
 
-        file = File.get_inferring_info(store, store_path, sourcename,
-                                       info=file_info[full_path])
-        inst = FileInstance(store, parent_dirs, name)
+    entries = [(store_path, file_info[slashed_prefix + store_path])
+               for store_path, parent_dirs, name in paths
+               if (parent_dirs, name) not in known]
+
+    # OK, we have to create some stuff. Register all of the Files in one go,
+    # and commit them along with their instances and events, rather than
+    # committing them one at a time.
+
+    files = File.register_many(store, entries, sourcename, commit=False)
+    new_files = [f for f in dict.fromkeys(files) if f in db.session.new]
+    events = []
+
+    for (store_path, _), file in zip(entries, files):
+        inst = FileInstance(store, os.path.dirname(store_path), os.path.basename(store_path))
         db.session.add(inst)
-        db.session.add(file.make_instance_creation_event(inst, store))
+        events.append(file.make_instance_creation_event(inst, store))
 
     try:
+        # The events refer to the new Files, so those need to be flushed
+        # before the events are bulk-inserted.
+        db.session.flush()
+        FileEvent.bulk_create(events)
         db.session.commit()
     except SQLAlchemyError:
         db.session.rollback()
         app.log_exception(sys.exc_info())
         raise ServerError('failed to commit new records to database; see logs for details')
 
+    from . import mc_integration as MC
+
+    for file in new_files:
+        MC.note_file_created(file)
+
     # Finally, trigger a look at our standing orders.
 
     from .search import queue_standing_order_copies
@@ -677,7 +702,7 @@ def launch_copy_by_file_name(
         raise ServerError('failed to commit copy-launch event to database')
 
 
-@app.route('/api/launch_file_copy', methods=['GET', 'POST'])
+@blueprint.route('/api/launch_file_copy', methods=['GET', 'POST'])
 @json_api
 def launch_file_copy(args, sourcename=None):
     """Launch a copy of a file to a remote store.
@@ -826,7 +851,7 @@ class OffloaderTask (bgtasks.BackgroundTask):
 OFFLOAD_BATCH_SIZE = 200
 
 
-@app.route('/api/initiate_offload', methods=['GET', 'POST'])
+@blueprint.route('/api/initiate_offload', methods=['GET', 'POST'])
 @json_api
 def initiate_offload(args, sourcename=None):
     """Launch a task to offload file instances from one store to another.
@@ -915,14 +940,14 @@ def initiate_offload(args, sourcename=None):
     return {'outcome': 'task-launched', 'instance-count': len(info)}
 
 
-@app.route('/stores/<string:name>/make-available', methods=['POST'])
+@blueprint.route('/stores/<string:name>/make-available', methods=['POST'])
 @login_required
 def make_store_available(name):
     try:
         store = Store.get_by_name(name)
     except ServerError as e:
         flash(str(e))
-        return redirect(url_for('stores'))
+        return redirect(url_for('store.stores'))
 
     store.available = True
 
@@ -932,20 +957,20 @@ def make_store_available(name):
         db.session.rollback()
         app.log_exception(sys.exc_info())
         flash('Failed to update database?! See server logs for details.')
-        return redirect(url_for('stores'))
+        return redirect(url_for('store.stores'))
 
     flash('Marked store "%s" as available' % store.name)
-    return redirect(url_for('stores') + '/' + store.name)
+    return redirect(url_for('store.stores') + '/' + store.name)
 
 
-@app.route('/stores/<string:name>/make-unavailable', methods=['POST'])
+@blueprint.route('/stores/<string:name>/make-unavailable', methods=['POST'])
 @login_required
 def make_store_unavailable(name):
     try:
         store = Store.get_by_name(name)
     except ServerError as e:
         flash(str(e))
-        return redirect(url_for('stores'))
+        return redirect(url_for('store.stores'))
 
     store.available = False
 
@@ -955,15 +980,15 @@ def make_store_unavailable(name):
         db.session.rollback()
         app.log_exception(sys.exc_info())
         flash('Failed to update database?! See server logs for details.')
-        return redirect(url_for('stores'))
+        return redirect(url_for('store.stores'))
 
     flash('Marked store "%s" as unavailable' % store.name)
-    return redirect(url_for('stores') + '/' + store.name)
+    return redirect(url_for('store.stores') + '/' + store.name)
 
 
 # Web user interface
 
-@app.route('/stores')
+@blueprint.route('/stores')
 @login_required
 def stores():
     q = Store.query.order_by(Store.name.asc())
@@ -974,7 +999,7 @@ def stores():
     )
 
 
-@app.route('/stores/<string:name>')
+@blueprint.route('/stores/<string:name>')
 @login_required
 def specific_store(name):
     from sqlalchemy import func
@@ -983,7 +1008,7 @@ def specific_store(name):
         store = Store.get_by_name(name)
     except ServerError as e:
         flash(str(e))
-        return redirect(url_for('stores'))
+        return redirect(url_for('store.stores'))
 
     from .file import FileInstance
     num_instances = (db.session.query(func.count())
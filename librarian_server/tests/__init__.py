@@ -6,6 +6,7 @@
 """
 
 import pytest
+import json
 import os
 
 
@@ -29,3 +30,13 @@ md5sums = [
 
 pathsizes = [224073, 983251]  # uvh5, miriad
 
+
+def call_api(app, operation, **kwargs):
+    """Make a JSON API call to the app as the test user, returning the decoded
+    reply.
+
+    """
+    kwargs["authenticator"] = "I am a bot"
+    with app.test_client() as c:
+        r = c.post("/api/" + operation, data={"request": json.dumps(kwargs)})
+    return json.loads(r.data)
@@ -66,3 +66,46 @@ def db_connection():
     db = SQLAlchemy(app)
     return logger, app, db
 
+
+@pytest.fixture
+def server_db():
+    """Run a test against the server's own app and database, with its routes
+    registered. The database is the one named by the configuration, set up by
+    `alembic upgrade head`.
+
+    We create a Store and an Observation that can't collide with any existing
+    records. Files that tests create should belong to that Observation so that
+    we can clean up just the records that the test made.
+
+    """
+    import uuid
+    from sqlalchemy import func
+    from librarian_server import app, db, register_blueprints
+    from librarian_server.file import File, FileEvent, FileInstance
+    from librarian_server.observation import Observation
+    from librarian_server.store import Store
+
+    register_blueprints()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        obsid = (db.session.query(func.max(Observation.obsid)).scalar() or 0) + 1
+        store = Store("test." + uuid.uuid4().hex, "/tmp/librarian-test", "localhost")
+        obs = Observation(obsid, 2458043.1, 2458043.2, 1.0)
+        db.session.add(store)
+        db.session.add(obs)
+        db.session.commit()
+        store_id = store.id
+
+        yield app, db, store, obs
+
+        db.session.rollback()
+        names = db.session.query(File.name).filter(File.obsid == obsid)
+        FileEvent.query.filter(FileEvent.name.in_(names)).delete(synchronize_session=False)
+        FileInstance.query.filter(
+            (FileInstance.store == store_id) | FileInstance.name.in_(names)
+        ).delete(synchronize_session=False)
+        File.query.filter(File.obsid == obsid).delete(synchronize_session=False)
+        Store.query.filter(Store.id == store_id).delete(synchronize_session=False)
+        Observation.query.filter(Observation.obsid == obsid).delete(synchronize_session=False)
+        db.session.commit()
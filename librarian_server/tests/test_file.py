@@ -0,0 +1,171 @@
+# -*- mode: python; coding: utf-8 -*-
+# Copyright 2026 the HERA Collaboration
+# Licensed under the 2-clause BSD License
+
+"""Test code in librarian_server/file.py
+
+"""
+
+
+import calendar
+import datetime
+import math
+
+import pytest
+
+from . import call_api
+from librarian_server.file import File, FileEvent, _check_name
+from librarian_server.webutil import ServerError
+
+
+def test_event_payload_roundtrip():
+    # test that payloads survive being encoded and decoded
+    payload = {"int": 1, "big": 2**70, "text": "abc", "list": [1.5, None]}
+    event = FileEvent("zen.2458043.12552.xx.HH.uvA", "test", payload)
+    assert event.payload_json == payload
+
+    # test reading payloads with NaNs, as written by older servers
+    event.payload = '{"value": NaN}'
+    assert math.isnan(event.payload_json["value"])
+
+    return
+
+
+def test_event_bulk_create(server_db):
+    app, db, store, obs = server_db
+    file = File("test.bulk", "test", obs.obsid, "TestUser", 1, "0" * 32)
+    db.session.add(file)
+    db.session.commit()
+
+    # test that a batch of events is inserted, with IDs from the sequence
+    events = [file.make_generic_event("test", n=i) for i in range(3)]
+    FileEvent.bulk_create(events)
+    db.session.commit()
+
+    stored = FileEvent.query.filter(FileEvent.name == "test.bulk").order_by(FileEvent.id).all()
+    assert [e.payload_json["n"] for e in stored] == [0, 1, 2]
+    assert len(set(e.id for e in stored)) == 3
+
+    # test that nothing is inserted by an empty batch
+    FileEvent.bulk_create([])
+    db.session.commit()
+    assert FileEvent.query.filter(FileEvent.name == "test.bulk").count() == 3
+
+    return
+
+
+def test_create_file_events_batch(server_db, monkeypatch):
+    app, db, store, obs = server_db
+    for name in ("test.batch1", "test.batch2"):
+        db.session.add(File(name, "test", obs.obsid, "TestUser", 1, "0" * 32))
+    db.session.commit()
+
+    def n_events():
+        return FileEvent.query.filter(FileEvent.name.startswith("test.batch")).count()
+
+    # test that a batch is applied with a single commit
+    commits = []
+    real_commit = db.session.commit
+
+    def counting_commit():
+        commits.append(1)
+        real_commit()
+
+    monkeypatch.setattr(db.session, "commit", counting_commit)
+    events = [
+        {"file_name": "test.batch1", "type": "test", "payload": {"n": 1}},
+        {"file_name": "test.batch2", "type": "test", "payload": {"n": 2}},
+        {"file_name": "test.batch1", "type": "other", "payload": {}},
+    ]
+    reply = call_api(app, "create_file_events_batch", events=events)
+    assert reply["success"]
+    assert len(commits) == 1
+    monkeypatch.undo()
+    assert n_events() == 3
+    assert File.query.get("test.batch1").events[0].payload_json == {"n": 1}
+
+    # test that an unknown file rejects the whole batch
+    events = [
+        {"file_name": "test.batch2", "type": "test", "payload": {}},
+        {"file_name": "test.unknown", "type": "test", "payload": {}},
+    ]
+    reply = call_api(app, "create_file_events_batch", events=events)
+    assert not reply["success"]
+    assert reply["message"] == 'no known file "test.unknown"'
+    assert n_events() == 3
+
+    # test that an empty batch does nothing
+    reply = call_api(app, "create_file_events_batch", events=[])
+    assert reply["success"]
+    assert n_events() == 3
+
+    # test that items must be dictionaries
+    events = [{"file_name": "test.batch2", "type": "test", "payload": {}}, "test.batch2"]
+    reply = call_api(app, "create_file_events_batch", events=events)
+    assert not reply["success"]
+    assert reply["message"].startswith('items of parameter "events" should be dictionaries')
+    assert n_events() == 3
+
+    return
+
+
+def test_register_many(server_db):
+    app, db, store, obs = server_db
+    prev = File("test.known", "test", obs.obsid, "TestUser", 1, "0" * 32)
+    db.session.add(prev)
+    db.session.commit()
+
+    # test that known files are skipped, without looking at their info
+    info = {"size": 2, "md5": "1" * 32, "type": "test", "obsid": obs.obsid}
+    files = File.register_many(store, [("a/test.known", {}), ("a/test.new", info)], "TestUser")
+    assert files[0] is prev
+    assert files[0].size == 1
+    assert files[1].name == "test.new"
+    assert File.query.get("test.new").size == 2
+
+    # test that an error partway through the batch rolls back the files
+    # pending before it; the fixture's obsid is the largest one we know of
+    bad_info = dict(info, obsid=obs.obsid + 1)
+    with pytest.raises(ServerError):
+        File.register_many(store, [("a/test.good", info), ("a/test.bad", bad_info)], "TestUser")
+    assert File.query.get("test.good") is None
+    assert File.query.get("test.bad") is None
+
+    return
+
+
+def test_check_name():
+    # test names that are allowed
+    _check_name("zen.2458043.12552.xx.HH.uvA")
+    _check_name("x" * 256)
+
+    # test names that are not
+    for name in ("", "x" * 257, "a/b", "/b", "a/"):
+        with pytest.raises(ValueError) as cm:
+            _check_name(name)
+        assert str(cm.value).startswith('illegal file name "%s"' % name)
+
+    return
+
+
+def test_create_time_unix():
+    # test that we agree with the timetuple-based computation, including for
+    # times before 1970 with fractional seconds
+    times = [
+        datetime.datetime(1970, 1, 1),
+        datetime.datetime(2017, 10, 16, 3, 1, 7),
+        datetime.datetime(2017, 10, 16, 3, 1, 7, 999999),
+        datetime.datetime(1969, 12, 31, 23, 59, 59, 500000),
+        datetime.datetime(1960, 6, 30, 12, 0, 0, 1),
+    ]
+    for t in times:
+        file = File("zen.2458043.12552.xx.HH.uvA", "uvA", None, "TestUser", 1, "0" * 32,
+                    create_time=t)
+        assert file.create_time_unix == calendar.timegm(t.timetuple())
+
+    # in particular, fractional seconds before 1970 are rounded down
+    file = File("zen.2458043.12552.xx.HH.uvA", "uvA", None, "TestUser", 1, "0" * 32,
+                create_time=times[3])
+    assert file.create_time_unix == -1
+
+    return
@@ -10,7 +10,7 @@
 import pytest
 import urllib.request, urllib.error, urllib.parse
 
-from . import ALL_FILES, filetypes, obsids, md5sums, pathsizes
+from . import ALL_FILES, call_api, filetypes, obsids, md5sums, pathsizes
 from librarian_server import webutil
 from librarian_server.webutil import AuthFailedError, ServerError
 
@@ -19,3 +19,35 @@ from librarian_server.webutil import AuthFailedError, ServerError
 def test_initiate_upload():
     # test uploading a datafile
     pass
+
+
+def test_register_instances(server_db):
+    from librarian_server.file import File, FileInstance
+
+    app, db, store, obs = server_db
+
+    # test that a file that appears in two directories in one batch is
+    # registered once, with two instances
+    info = {"size": 1, "md5": "0" * 32, "type": "test", "obsid": obs.obsid}
+    file_info = {
+        store.path_prefix + "/a/test.dup": info,
+        store.path_prefix + "/b/test.dup": info,
+    }
+    reply = call_api(app, "register_instances", store_name=store.name, file_info=file_info)
+    assert reply["success"]
+
+    assert File.query.filter(File.name == "test.dup").count() == 1
+    insts = FileInstance.query.filter(FileInstance.name == "test.dup").all()
+    assert sorted(i.parent_dirs for i in insts) == ["a", "b"]
+    assert len(File.query.get("test.dup").events) == 2
+
+    # test that instances that we already know about are ignored
+    file_info[store.path_prefix + "/c/test.dup"] = info
+    reply = call_api(app, "register_instances", store_name=store.name, file_info=file_info)
+    assert reply["success"]
+
+    insts = FileInstance.query.filter(FileInstance.name == "test.dup").all()
+    assert sorted(i.parent_dirs for i in insts) == ["a", "b", "c"]
+    assert len(File.query.get("test.dup").events) == 3
+
+    return
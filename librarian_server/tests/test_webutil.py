@@ -11,6 +11,7 @@ import pytest
 import numpy as np
 import json
 import urllib.request, urllib.parse, urllib.error
+from flask import Flask
 
 from librarian_server import webutil
 from librarian_server.webutil import AuthFailedError, ServerError, json_api
@@ -186,3 +187,77 @@ def test_optional_arg():
     assert arg3 == 7
 
     return
+
+
+def test_json_api_request_parsing():
+    # use a fresh app, since routes can't be added to one that has already
+    # handled requests
+    app = Flask("test_json_api_request_parsing")
+
+    @app.route("/echo/", methods=["POST"])
+    @json_api
+    def echo(args, sourcename=None):
+        return {"big": args["big"], "isnan": args["nan"] != args["nan"]}
+
+    c = app.test_client()
+
+    # test that requests encoded by the standard library, which may contain
+    # NaNs and integers wider than 64 bits, are parsed faithfully
+    mydict = {"big": 2**70, "nan": float("nan"), "authenticator": "I am a bot"}
+    req_dict = {"request": json.dumps(mydict)}
+    r = c.post("/echo/", data=req_dict)
+    assert r.status_code == 200
+    outdict = json.loads(r.data)
+    assert outdict["success"] == True
+    assert outdict["big"] == 2**70
+    assert outdict["isnan"] == True
+
+    return
+
+
+def test_json_api_response_encoding():
+    # use a fresh app, since routes can't be added to one that has already
+    # handled requests
+    app = Flask("test_json_api_response_encoding")
+
+    @app.route("/big_int_return/")
+    @json_api
+    def big_int_return(args, sourcename=None):
+        return {"big": 2**70}
+
+    @app.route("/int_key_return/")
+    @json_api
+    def int_key_return(args, sourcename=None):
+        return {"records": {1225829886: "uvh5"}}
+
+    @app.route("/ndarray_return/")
+    @json_api
+    def ndarray_return(args, sourcename=None):
+        return {"array": np.asarray([0, 1, 2])}
+
+    c = app.test_client()
+    mydict = {"authenticator": "I am a bot"}
+    req_url = urllib.parse.urlencode({"request": json.dumps(mydict)})
+
+    # test integers too wide for orjson
+    r = c.get("/big_int_return/?" + req_url)
+    assert r.status_code == 200
+    assert r.mimetype == "application/json"
+    outdict = json.loads(r.data)
+    assert outdict["success"] == True
+    assert outdict["big"] == 2**70
+
+    # test that integer keys become strings
+    r = c.get("/int_key_return/?" + req_url)
+    assert r.status_code == 200
+    outdict = json.loads(r.data)
+    assert outdict["records"] == {"1225829886": "uvh5"}
+
+    # test that unencodable values still give an error response
+    r = c.get("/ndarray_return/?" + req_url)
+    assert r.status_code == 400
+    outdict = json.loads(r.data)
+    assert outdict["success"] == False
+    assert outdict["message"].startswith("couldn't format response data")
+
+    return
@@ -12,18 +12,54 @@ __all__ = str('''
 AuthFailedError
 ServerError
 json_api
+json_dumps
 login_required
 login
 logout
 ''').split()
 
-from flask import Response, flash, redirect, render_template, request, session, url_for
+from flask import Blueprint, Response, flash, redirect, render_template, request, session, url_for
 import json
 import os
 import sys
 
 from . import app, logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# JSON encoding. We use orjson if it's available, since we do a lot of this:
+# every API call, and every FileEvent payload. It's stricter than the standard
+# library about what it will encode (e.g., integers wider than 64 bits), so we
+# fall back to the latter if it balks. We don't use it for decoding, though:
+# it rejects the NaN tokens that the standard library emits, and it silently
+# turns integers wider than 64 bits into floats.
+
+def _json_dumps_bytes(obj):
+    """Encode *obj* as UTF-8 JSON bytes.
+
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+
+    return json.dumps(obj).encode('utf-8')
+
+
+def json_dumps(obj):
+    """Encode *obj* as JSON text.
+
+    """
+    return _json_dumps_bytes(obj).decode('utf-8')
+
+
+blueprint = Blueprint('webutil', __name__)
+
 
 # Generic authentication stuff
 
@@ -166,7 +202,7 @@ def json_api(f):
             status = 400
 
         try:
-            outtext = json.dumps(result)
+            outtext = _json_dumps_bytes(result)
         except Exception as e:
             result = {
                 'success': False,
@@ -250,12 +286,12 @@ def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'sourcename' not in session:
-            return redirect(url_for('login', next=request.url))
+            return redirect(url_for('webutil.login', next=request.url))
         return f(*args, **kwargs)
     return decorated_function
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@blueprint.route('/login', methods=['GET', 'POST'])
 def login():
     if len(request.form):
         reqdata = request.form  # POST
@@ -264,7 +300,7 @@ def login():
 
     next = reqdata.get('next')
     if next is None:
-        next = url_for('index')
+        next = url_for('misc.index')
 
     if request.method == 'GET':
         return render_template('login.html', next=next)
@@ -281,10 +317,10 @@ def login():
     return redirect(next)
 
 
-@app.route('/logout')
+@blueprint.route('/logout')
 def logout():
     session.pop('sourcename', None)
-    return redirect(url_for('index'))
+    return redirect(url_for('misc.index'))
 
 
 # Streaming of data through the tornado asynchronous API